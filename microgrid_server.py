@@ -1,21 +1,56 @@
 # -*- coding: utf-8 -*-
 import asyncio
-import json
-import random
+import functools
 import time
 import math
+from collections import deque
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, Any
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 import uvicorn
 import numpy as np
+import orjson
 import pandas as pd
 from pydantic import BaseModel
 
-app = FastAPI(title="Microgrid Data Simulation Server", version="1.0.0")
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the numeric helpers run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+# CSV lookups are pinned to this day of the plant recording (time of day follows the clock)
+CSV_DEMO_DAY = datetime(2020, 5, 15)
+
+# Seconds between simulation ticks pushed to WebSocket clients
+UPDATE_INTERVAL = 2
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile up front rather than stalling the event loop on the first tick
+    _warm_up_numeric_helpers()
+    
+    # One background producer feeds every WebSocket client
+    producer = asyncio.create_task(produce_updates())
+    yield
+    producer.cancel()
+    with suppress(asyncio.CancelledError):
+        await producer
+    await manager.close()
+
+# ORJSONResponse renders JSON routes with orjson instead of the stdlib encoder
+app = FastAPI(
+    title="Microgrid Data Simulation Server",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="."), name="static")
@@ -29,79 +64,253 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# The key-heavy JSON snapshot compresses well; small responses go out as-is
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        # Each client gets a one-slot mailbox holding the newest undelivered payload
+        self.active_connections: Dict[WebSocket, asyncio.Queue] = {}
+        self._writers: Dict[WebSocket, asyncio.Task] = {}
+        
+        # Newest broadcast payload, so a new client gets a frame without waiting for a tick
+        self._latest_payload = None
+        # Set when a client joins with nothing cached, so the producer ticks right away
+        self.payload_needed = asyncio.Event()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        queue = asyncio.Queue(maxsize=1)
+        if self._latest_payload is not None:
+            queue.put_nowait(self._latest_payload)
+        else:
+            self.payload_needed.set()
+        self.active_connections[websocket] = queue
+        self._writers[websocket] = asyncio.create_task(self._write_loop(websocket, queue))
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        # A failed send may already have dropped this client
+        self.active_connections.pop(websocket, None)
+        if not self.active_connections:
+            # Ticks stop while nobody listens, so the cached payload would go stale
+            self._latest_payload = None
+        writer = self._writers.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
+    async def close(self):
+        """Stop every client writer and wait for each to finish"""
+        writers = list(self._writers.values())
+        self.active_connections.clear()
+        self._writers.clear()
+        self._latest_payload = None
+        for writer in writers:
+            writer.cancel()
+        for writer in writers:
+            with suppress(asyncio.CancelledError):
+                await writer
+
+    async def _write_loop(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Deliver payloads to one client at its own pace until a send fails"""
+        while True:
+            message = await queue.get()
             try:
-                await connection.send_text(message)
-            except:
+                await websocket.send_bytes(message)
+            except (WebSocketDisconnect, Exception):
                 # Remove disconnected clients
-                self.active_connections.remove(connection)
+                self.disconnect(websocket)
+                return
+
+    async def broadcast(self, message: bytes):
+        self._latest_payload = message
+        for queue in self.active_connections.values():
+            # Payloads are full snapshots, so a slow client just skips to the newest one
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
 
 manager = ConnectionManager()
 
+# Hour-of-day curves only take 24 values, so evaluate them once at import.
+# Solar generation peaks at noon (12), is zero from 6 PM to 6 AM (sinusoidal in between)
+_SOLAR_FACTOR_BY_HOUR = tuple(
+    max(0.0, math.sin(math.pi * (hour - 6) / 12)) if 6 <= hour <= 18 else 0.0
+    for hour in range(24)
+)
+# Daily load profile (higher during day, lower at night)
+_BASE_LOAD_BY_HOUR = tuple(
+    max(25.0, 40 + 20 * math.sin(math.pi * (hour - 6) / 12))
+    for hour in range(24)
+)
+
+# Turbine power curve (kW) sampled every 0.1 m/s over 0-20 m/s. Wind speed is
+# reported to one decimal, so a table lookup reproduces the curve exactly.
+_WIND_SPEEDS = np.arange(201) / 10
+_WIND_POWER_CURVE = np.where(
+    _WIND_SPEEDS < 3, 0.0,
+    np.where(_WIND_SPEEDS < 12, np.minimum(25.0, 0.5 * _WIND_SPEEDS ** 2.5), 25.0)
+)
+
+# Pure numeric helpers for the per-tick simulation, JIT-compiled when numba is installed
+
+@njit(cache=True)
+def _solar_dc_ac(irradiance, temp, inverter_efficiency, noise_dc, noise_ac):
+    """DC and AC PV output (kW) for the given irradiance and ambient temperature"""
+    # Solar panel efficiency decreases with temperature
+    temp_coefficient = -0.004  # -0.4%/degC
+    temp_loss = temp_coefficient * (temp - 25)
+    efficiency = 0.20 + temp_loss  # 20% base efficiency
+    
+    # DC power calculation (simplified)
+    panel_area = 300  # m^2
+    dc_power = (irradiance / 1000) * panel_area * efficiency
+    
+    # AC power (inverter efficiency ~95%)
+    ac_power = dc_power * inverter_efficiency
+    return dc_power + noise_dc, ac_power + noise_ac
+
+@njit(cache=True)
+def _wind_power(wind_speed, efficiency, noise):
+    """Wind turbine output (kW) from the simplified power curve"""
+    # Above 20 m/s the curve is flat at rated power
+    idx = min(200, max(0, int(round(wind_speed * 10))))
+    return _WIND_POWER_CURVE[idx] * efficiency + noise
+
+@njit(cache=True)
+def _demand_base(hour, r_load, r_critical, r_peak):
+    """Total, critical and flexible load plus peak reduction for an hour of day"""
+    # Add some randomness to the daily load profile
+    total_load = _BASE_LOAD_BY_HOUR[hour] + (-5 + 15 * r_load)
+    critical_loads = total_load * (0.35 + 0.1 * r_critical)
+    
+    # Peak reduction effectiveness
+    peak_reduction = 20 + 10 * r_peak
+    return total_load, critical_loads, total_load - critical_loads, peak_reduction
+
+def _warm_up_numeric_helpers():
+    """Call each helper once so JIT compilation happens before the first tick"""
+    _solar_dc_ac(500.0, 25.0, 0.95, 0.0, 0.0)
+    _wind_power(8.0, 0.9, 0.0)
+    _demand_base(12, 0.5, 0.5, 0.5)
+
 class MicrogridSimulator:
     def __init__(self):
         self.time_offset = 0
         self.base_wind_speed = 8.2
-        self.battery_socs = [72, 68, 65, 63]  # Initial SOC for 4 battery packs
+        self.battery_socs = np.array([72, 68, 65, 63], dtype=np.float32)  # Initial SOC for 4 battery packs
+        
+        # Pack dicts allocated once and updated in place every tick
+        self._pack_templates = [
+            {"id": i + 1, "soc": 0.0, "soh": 0, "temp": 0.0, "voltage": 0.0}
+            for i in range(len(self.battery_socs))
+        ]
         self.system_efficiency = 92.8
         self.uptime = 99.7
         self.alerts = []
+        self._active_alerts = set()  # Condition keys that were true on the previous tick
         
         # Historical data for trends
-        self.historical_data = []
         self.max_history = 50
+        self.historical_data = deque(maxlen=self.max_history)
+        
+        # Each history point pre-encoded as JSON, so broadcasts only encode the newest one
+        self._history_frags = deque(maxlen=self.max_history)
+        
+        # All per-tick randomness comes from one batched draw of this generator
+        self._rng = np.random.default_rng()  # PCG64
+        self._scratch = np.empty(32)  # Refilled in place every tick
+        
+        # Recent CSV rows memoized by timestamp index, so every call that lands on
+        # the same 15-minute CSV slot reuses one row
+        self._csv_row_at = functools.lru_cache(maxsize=8)(self._build_csv_row)
         
         # Load CSV data
         try:
-            self.solar_data = pd.read_csv('Plant_1_Generation_Data.csv')
-            self.solar_data['DATE_TIME'] = pd.to_datetime(self.solar_data['DATE_TIME'], format='%d/%m/%Y %H:%M')
+            # Only the columns the simulator aggregates; float32 halves their memory
+            self.solar_data = pd.read_csv(
+                'Plant_1_Generation_Data.csv',
+                usecols=['DATE_TIME', 'DC_POWER', 'AC_POWER', 'AMBIENT_TEMPERATURE', 'MODULE_TEMPERATURE', 'IRRADIATION'],
+                dtype={
+                    'DC_POWER': 'float32',
+                    'AC_POWER': 'float32',
+                    'AMBIENT_TEMPERATURE': 'float32',
+                    'MODULE_TEMPERATURE': 'float32',
+                    'IRRADIATION': 'float32'
+                },
+                parse_dates=['DATE_TIME'],
+                date_format='%d/%m/%Y %H:%M'
+            )
             print(f"Loaded {len(self.solar_data)} solar data records")
         except Exception as e:
             print(f"Error loading CSV: {e}")
             self.solar_data = None
         
-    def get_time_factor(self):
+        if self.solar_data is not None:
+            self._build_csv_index()
+        
+    def _build_csv_index(self):
+        """Precompute every per-timestamp aggregate once so a lookup is just an array index"""
+        groups = self.solar_data.groupby('DATE_TIME')
+        sums = groups[['DC_POWER', 'AC_POWER']].sum() / 1000  # Convert to kW
+        means = groups[['AMBIENT_TEMPERATURE', 'MODULE_TEMPERATURE', 'IRRADIATION']].mean()
+        
+        # Sorted timestamps as seconds from midnight of the demo day, for binary search
+        self._csv_seconds = (sums.index - CSV_DEMO_DAY).total_seconds().to_numpy()
+        
+        # Aggregates for all inverters reporting at each timestamp, aligned with _csv_seconds
+        # (widened back to float64 so rows convert to exact short Python floats)
+        self._dc_kw = sums['DC_POWER'].to_numpy(dtype=np.float64)
+        self._ac_kw = sums['AC_POWER'].to_numpy(dtype=np.float64)
+        self._amb_temp = means['AMBIENT_TEMPERATURE'].to_numpy(dtype=np.float64)
+        self._mod_temp = means['MODULE_TEMPERATURE'].to_numpy(dtype=np.float64)
+        self._irr = means['IRRADIATION'].to_numpy(dtype=np.float64)
+    
+    def _nearest_csv_index(self, now):
+        """Get the position of the CSV timestamp closest to now"""
+        # Get current time (use a sample time for demo)
+        current_time = now.replace(year=CSV_DEMO_DAY.year, month=CSV_DEMO_DAY.month, day=CSV_DEMO_DAY.day)
+        now_s = (current_time - CSV_DEMO_DAY).total_seconds()
+        
+        # Nearest neighbour around the insertion point (earlier one wins ties)
+        i = np.searchsorted(self._csv_seconds, now_s)
+        if i == len(self._csv_seconds) or (
+            i > 0 and now_s - self._csv_seconds[i - 1] <= self._csv_seconds[i] - now_s
+        ):
+            i -= 1
+        return i
+    
+    def _build_csv_row(self, i):
+        """Get the CSV aggregates stored at timestamp index i"""
+        return {
+            "dc": self._dc_kw[i].item(),
+            "ac": self._ac_kw[i].item(),
+            "amb_temp": self._amb_temp[i].item(),
+            "mod_temp": self._mod_temp[i].item(),
+            "irr": self._irr[i].item()
+        }
+    
+    def _lookup_csv_row(self, now):
+        """Get CSV aggregates for the timestamp closest to now"""
+        return self._csv_row_at(int(self._nearest_csv_index(now)))
+        
+    def get_time_factor(self, now=None):
         """Get time-based factor for solar generation (0 at night, 1 at noon)"""
-        hour = (datetime.now().hour + self.time_offset) % 24
-        # Solar generation peaks at noon (12), is zero from 6 PM to 6 AM
-        if 6 <= hour <= 18:
-            # Sinusoidal curve peaking at noon
-            return max(0, math.sin(math.pi * (hour - 6) / 12))
-        return 0
+        if now is None:
+            now = datetime.now()
+        return _SOLAR_FACTOR_BY_HOUR[(now.hour + self.time_offset) % 24]
     
-    def get_solar_data_from_csv(self):
+    def get_solar_data_from_csv(self, row=None, r=None, now=None):
         """Get solar data from CSV based on current time"""
         if self.solar_data is None:
-            return self.simulate_solar_fallback()
+            return self.simulate_solar_fallback(r, now)
         
-        # Get current time (use a sample time for demo)
-        current_time = datetime.now().replace(year=2020, month=5, day=15)
-        
-        # Find closest time match in CSV
-        time_diff = abs(self.solar_data['DATE_TIME'] - current_time)
-        closest_idx = time_diff.idxmin()
-        
-        # Get data for all inverters at this time
-        time_data = self.solar_data[self.solar_data['DATE_TIME'] == self.solar_data.loc[closest_idx, 'DATE_TIME']]
+        if row is None:
+            row = self._lookup_csv_row(now if now is not None else datetime.now())
         
-        # Aggregate data
-        total_dc = time_data['DC_POWER'].sum() / 1000  # Convert to kW
-        total_ac = time_data['AC_POWER'].sum() / 1000  # Convert to kW
-        avg_temp = time_data['AMBIENT_TEMPERATURE'].mean()
-        avg_module_temp = time_data['MODULE_TEMPERATURE'].mean()
-        avg_irradiation = time_data['IRRADIATION'].mean()
+        total_dc = row["dc"]
+        total_ac = row["ac"]
+        avg_module_temp = row["mod_temp"]
+        avg_irradiation = row["irr"]
         
         efficiency = (total_ac / max(total_dc, 0.1)) * 100 if total_dc > 0 else 0
         
@@ -113,19 +322,19 @@ class MicrogridSimulator:
             "moduleTemp": round(avg_module_temp, 1)
         }
     
-    def simulate_solar_fallback(self):
+    def simulate_solar_fallback(self, r=None, now=None):
         """Fallback solar simulation if CSV not available"""
-        time_factor = self.get_time_factor()
-        irradiance = 875 * time_factor + random.uniform(-50, 50)
-        irradiance = max(0, min(1200, irradiance))
+        if r is None:
+            r = self._rng.random(3)
+        r_irr, r_temp, r_inv = r.tolist()
         
-        temp = 28.5 + random.uniform(-3, 3)
-        temp_coefficient = -0.004
-        temp_loss = temp_coefficient * (temp - 25)
-        efficiency = 0.20 + temp_loss
+        time_factor = self.get_time_factor(now)
+        irradiance = 875 * time_factor + (-50 + 100 * r_irr)
+        irradiance = max(0, min(1200, irradiance))
         
-        dc_power = (irradiance / 1000) * 300 * efficiency
-        ac_power = dc_power * random.uniform(0.93, 0.97)
+        temp = 28.5 + (-3 + 6 * r_temp)
+        # Clamping can yield the int 0; keep the JIT helper on its warmed-up float signature
+        dc_power, ac_power = _solar_dc_ac(float(irradiance), temp, 0.93 + 0.04 * r_inv, 0.0, 0.0)
         
         return {
             "dcPower": round(max(0, dc_power), 1),
@@ -135,15 +344,18 @@ class MicrogridSimulator:
             "moduleTemp": round(temp + (irradiance / 1000) * 20, 1)
         }
     
-    def get_realtime_weather(self):
+    def get_realtime_weather(self, r=None, now=None):
         """Get real-time weather from Open-Meteo API"""
+        if now is None:
+            now = datetime.now()
+        
         try:
             url = "https://api.open-meteo.com/v1/forecast?latitude=28.6519&longitude=77.2315&daily=sunrise,sunset,daylight_duration,uv_index_max&hourly=temperature_2m,relative_humidity_2m,apparent_temperature,rain,weather_code,cloud_cover,cloud_cover_high,cloud_cover_mid,cloud_cover_low,visibility,wind_speed_10m,wind_direction_10m,uv_index,is_day,sunshine_duration,direct_normal_irradiance,direct_normal_irradiance_instant&timezone=Asia%2FSingapore"
             
             response = requests.get(url, timeout=5)
             if response.status_code == 200:
                 data = response.json()
-                current_hour = datetime.now().hour
+                current_hour = now.hour
                 
                 # Get current hour data from hourly forecast
                 hourly = data['hourly']
@@ -152,7 +364,7 @@ class MicrogridSimulator:
                 # Use direct normal irradiance if available
                 irradiance = hourly['direct_normal_irradiance'][current_idx] or 0
                 if irradiance == 0:
-                    time_factor = self.get_time_factor()
+                    time_factor = self.get_time_factor(now)
                     cloud_factor = (100 - hourly['cloud_cover'][current_idx]) / 100
                     irradiance = 1000 * time_factor * cloud_factor
                 
@@ -166,35 +378,30 @@ class MicrogridSimulator:
         except Exception as e:
             print(f"Weather API error: {e}")
         
-        return self.simulate_weather_fallback()
+        return self.simulate_weather_fallback(r, now)
     
-    def get_weather_from_csv(self):
+    def get_weather_from_csv(self, row=None, r=None, now=None):
         """Get weather data from CSV"""
         if self.solar_data is None:
-            return self.simulate_weather_fallback()
-        
-        # Get current time (use a sample time for demo)
-        current_time = datetime.now().replace(year=2020, month=5, day=15)
+            return self.simulate_weather_fallback(r, now)
         
-        # Find closest time match in CSV
-        time_diff = abs(self.solar_data['DATE_TIME'] - current_time)
-        closest_idx = time_diff.idxmin()
-        
-        # Get data for all inverters at this time
-        time_data = self.solar_data[self.solar_data['DATE_TIME'] == self.solar_data.loc[closest_idx, 'DATE_TIME']]
+        if row is None:
+            row = self._lookup_csv_row(now if now is not None else datetime.now())
         
         # Get weather values from CSV
-        avg_temp = time_data['AMBIENT_TEMPERATURE'].mean()
-        avg_module_temp = time_data['MODULE_TEMPERATURE'].mean()
-        avg_irradiation = time_data['IRRADIATION'].mean()
+        avg_temp = row["amb_temp"]
+        avg_irradiation = row["irr"]
         
         # Calculate cloud cover based on irradiation
         cloud_cover = max(0, 100 - (avg_irradiation / 10))
         
         # Simulate wind and humidity (not in CSV)
-        wind_speed = self.base_wind_speed + random.uniform(-2, 3)
+        if r is None:
+            r = self._rng.random(2)
+        r_wind, r_hum = r[:2].tolist()
+        wind_speed = self.base_wind_speed + (-2 + 5 * r_wind)
         wind_speed = max(0, min(20, wind_speed))
-        humidity = random.uniform(50, 85)
+        humidity = 50 + 35 * r_hum
         
         return {
             "temperature": round(avg_temp, 1),
@@ -204,20 +411,24 @@ class MicrogridSimulator:
             "cloudCover": round(cloud_cover, 0)
         }
     
-    def simulate_weather_fallback(self):
+    def simulate_weather_fallback(self, r=None, now=None):
         """Fallback weather simulation if CSV not available"""
-        time_factor = self.get_time_factor()
-        cloud_factor = random.uniform(0.7, 1.0)
+        if r is None:
+            r = self._rng.random(5)
+        r_cloud, r_irr, r_wind, r_temp, r_hum = r.tolist()
+        
+        time_factor = self.get_time_factor(now)
+        cloud_factor = 0.7 + 0.3 * r_cloud
         
         irradiance = 875 * time_factor * cloud_factor
-        irradiance += random.uniform(-50, 50)
+        irradiance += -50 + 100 * r_irr
         irradiance = max(0, min(1200, irradiance))
         
-        wind_speed = self.base_wind_speed + random.uniform(-2, 3)
+        wind_speed = self.base_wind_speed + (-2 + 5 * r_wind)
         wind_speed = max(0, min(20, wind_speed))
         
-        temperature = 28.5 + random.uniform(-3, 3)
-        humidity = random.uniform(50, 85)
+        temperature = 28.5 + (-3 + 6 * r_temp)
+        humidity = 50 + 35 * r_hum
         cloud_cover = int((1 - cloud_factor) * 100)
         
         return {
@@ -228,27 +439,19 @@ class MicrogridSimulator:
             "cloudCover": cloud_cover
         }
     
-    def simulate_solar_generation(self, weather_data):
+    def simulate_solar_generation(self, weather_data, r=None):
         """Simulate solar PV generation based on weather"""
+        if r is None:
+            r = self._rng.random(3)
+        r_inv, r_dc, r_ac = r.tolist()
+        
         irradiance = weather_data["irradiance"]
         temp = weather_data["temperature"]
         
-        # Solar panel efficiency decreases with temperature
-        temp_coefficient = -0.004  # -0.4%/�C
-        temp_loss = temp_coefficient * (temp - 25)
-        efficiency = 0.20 + temp_loss  # 20% base efficiency
-        
-        # DC power calculation (simplified)
-        panel_area = 300  # m�
-        dc_power = (irradiance / 1000) * panel_area * efficiency
-        
-        # AC power (inverter efficiency ~95%)
-        inverter_efficiency = random.uniform(0.93, 0.97)
-        ac_power = dc_power * inverter_efficiency
-        
-        # Add some realistic noise
-        dc_power += random.uniform(-2, 2)
-        ac_power += random.uniform(-2, 2)
+        # Inverter efficiency ~95%, plus some realistic noise on both outputs
+        dc_power, ac_power = _solar_dc_ac(
+            float(irradiance), temp, 0.93 + 0.04 * r_inv, -2 + 4 * r_dc, -2 + 4 * r_ac
+        )
         
         module_temp = temp + (irradiance / 1000) * 20  # Module temperature
         
@@ -260,22 +463,17 @@ class MicrogridSimulator:
             "moduleTemp": round(module_temp, 1)
         }
     
-    def simulate_wind_generation(self, weather_data):
+    def simulate_wind_generation(self, weather_data, r=None):
         """Simulate wind turbine generation"""
-        wind_speed = weather_data["windSpeed"]
+        if r is None:
+            r = self._rng.random(2)
+        r_eff, r_noise = r.tolist()
         
-        # Wind turbine power curve (simplified)
-        if wind_speed < 3:
-            power = 0
-        elif wind_speed < 12:
-            power = min(25, 0.5 * wind_speed ** 2.5)
-        else:
-            power = 25
+        wind_speed = weather_data["windSpeed"]
         
-        # Add noise and efficiency
-        efficiency = random.uniform(0.87, 0.92)
-        power *= efficiency
-        power += random.uniform(-1, 1)
+        # Power curve output with efficiency losses and noise
+        efficiency = 0.87 + 0.05 * r_eff
+        power = _wind_power(wind_speed, efficiency, -1 + 2 * r_noise)
         
         return {
             "power": round(max(0, power), 1),
@@ -283,12 +481,16 @@ class MicrogridSimulator:
             "efficiency": round(efficiency * 100, 1)
         }
     
-    def simulate_cbg_generation(self):
+    def simulate_cbg_generation(self, r=None):
         """Simulate CBG/biogas generation"""
+        if r is None:
+            r = self._rng.random(2)
+        r_power, r_eff = r.tolist()
+        
         # Biogas generation is relatively stable
         base_power = 18.5
-        power = base_power + random.uniform(-2, 2)
-        efficiency = random.uniform(0.89, 0.94)
+        power = base_power + (-2 + 4 * r_power)
+        efficiency = 0.89 + 0.05 * r_eff
         
         return {
             "power": round(max(0, power), 1),
@@ -296,21 +498,26 @@ class MicrogridSimulator:
             "efficiency": round(efficiency * 100, 1)
         }
     
-    def simulate_battery_system(self, net_power):
+    def simulate_battery_system(self, net_power, r=None):
         """Simulate battery storage system with SOC dynamics"""
         total_capacity = 150  # kWh
         
-        for i, pack in enumerate(self.battery_socs):
-            # Simulate slight SOC changes based on charge/discharge
-            if net_power > 0:  # Charging
-                self.battery_socs[i] += random.uniform(0, 0.2)
-            else:  # Discharging
-                self.battery_socs[i] -= random.uniform(0, 0.3)
-            
-            # Keep SOC within realistic bounds
-            self.battery_socs[i] = max(20, min(95, self.battery_socs[i]))
+        # One row of draws per quantity, one column per pack
+        num_packs = len(self.battery_socs)
+        if r is None:
+            r = self._rng.random(3 * num_packs)
+        r_delta, r_soh, r_temp = r.reshape(3, num_packs)
+        
+        # Simulate slight SOC changes based on charge/discharge (all packs at once)
+        if net_power > 0:  # Charging
+            self.battery_socs += 0.2 * r_delta
+        else:  # Discharging
+            self.battery_socs -= 0.3 * r_delta
         
-        overall_soc = sum(self.battery_socs) / len(self.battery_socs)
+        # Keep SOC within realistic bounds
+        np.clip(self.battery_socs, 20, 95, out=self.battery_socs)
+        
+        overall_soc = float(self.battery_socs.mean())
         
         # Determine charge/discharge power
         if net_power > 5:  # Excess generation
@@ -323,40 +530,40 @@ class MicrogridSimulator:
             charge_power = 0
             discharge_power = 0
         
-        battery_packs = []
-        for i, soc in enumerate(self.battery_socs):
-            battery_packs.append({
-                "id": i + 1,
-                "soc": round(soc, 0),
-                "soh": random.randint(93, 98),  # State of Health
-                "temp": round(random.uniform(23, 26), 1),
-                "voltage": round(48 + (soc - 50) * 0.02, 1)
-            })
+        # Display rounding done once per array (in float64, so values stay short decimals)
+        socs = self.battery_socs.astype(np.float64)
+        voltages = np.round(48 + (socs - 50) * 0.02, 1)
+        sohs = 93 + (6 * r_soh).astype(int)  # State of Health, 93-98
+        temps = np.round(23 + 3 * r_temp, 1)
+        socs = np.round(socs, 0)
+        
+        for pack, soc, soh, temp, voltage in zip(
+            self._pack_templates, socs.tolist(), sohs.tolist(), temps.tolist(), voltages.tolist()
+        ):
+            pack["soc"] = soc
+            pack["soh"] = soh
+            pack["temp"] = temp
+            pack["voltage"] = voltage
         
         return {
             "overallSOC": round(overall_soc, 0),
             "totalCapacity": total_capacity,
             "chargePower": round(charge_power, 1),
             "dischargePower": round(discharge_power, 1),
-            "batteryPacks": battery_packs
+            "batteryPacks": self._pack_templates
         }
     
-    def simulate_demand(self):
+    def simulate_demand(self, r=None, now=None):
         """Simulate electrical load demand"""
-        hour = datetime.now().hour
-        
-        # Daily load profile (higher during day, lower at night)
-        base_load = 40 + 20 * math.sin(math.pi * (hour - 6) / 12)
-        base_load = max(25, base_load)
-        
-        # Add some randomness
-        total_load = base_load + random.uniform(-5, 10)
-        
-        critical_loads = total_load * random.uniform(0.35, 0.45)
-        flexible_loads = total_load - critical_loads
+        if r is None:
+            r = self._rng.random(3)
+        r_load, r_critical, r_peak = r.tolist()
+        if now is None:
+            now = datetime.now()
         
-        # Peak reduction effectiveness
-        peak_reduction = random.uniform(20, 30)
+        total_load, critical_loads, flexible_loads, peak_reduction = _demand_base(
+            now.hour, r_load, r_critical, r_peak
+        )
         
         return {
             "totalLoad": round(total_load, 1),
@@ -365,21 +572,25 @@ class MicrogridSimulator:
             "peakReduction": round(peak_reduction, 1)
         }
     
-    def calculate_system_metrics(self, generation_data, demand_data):
+    def calculate_system_metrics(self, generation_data, demand_data, r=None):
         """Calculate overall system performance metrics"""
+        if r is None:
+            r = self._rng.random(5)
+        r_eff, r_volt, r_freq, r_thd, r_uptime = r.tolist()
+        
         total_gen = generation_data["solar"]["acPower"] + generation_data["wind"]["power"] + generation_data["cbg"]["power"]
         total_demand = demand_data["totalLoad"]
         
         # System efficiency (simplified)
-        efficiency = min(95, 90 + random.uniform(-2, 3))
+        efficiency = min(95, 90 + (-2 + 5 * r_eff))
         
         # Power quality simulation
-        voltage = 230 + random.uniform(-5, 5)
-        frequency = 50 + random.uniform(-0.1, 0.1)
-        thd = random.uniform(1.0, 2.5)
+        voltage = 230 + (-5 + 10 * r_volt)
+        frequency = 50 + (-0.1 + 0.2 * r_freq)
+        thd = 1.0 + 1.5 * r_thd
         
         # Uptime simulation (very high reliability)
-        self.uptime = min(100, self.uptime + random.uniform(-0.01, 0.02))
+        self.uptime = min(100, self.uptime + (-0.01 + 0.03 * r_uptime))
         
         return {
             "overallEfficiency": round(efficiency, 1),
@@ -391,72 +602,85 @@ class MicrogridSimulator:
             }
         }
     
-    def generate_alerts(self, data):
+    def generate_alerts(self, data, current_time=None):
         """Generate realistic system alerts"""
         new_alerts = []
-        current_time = datetime.now().strftime("%H:%M")
+        base_id = len(self.alerts)
+        active_alerts = set()
+        
+        def is_new(key):
+            # A condition alerts once when it becomes true, not on every tick it persists
+            active_alerts.add(key)
+            return key not in self._active_alerts
+        
+        def add_alert(alert_type, message):
+            # Standalone calls only read the clock once something actually fires
+            nonlocal current_time
+            if current_time is None:
+                current_time = datetime.now().strftime("%H:%M")
+            new_alerts.append({
+                "id": base_id + len(new_alerts) + 1,
+                "type": alert_type,
+                "message": message,
+                "time": current_time
+            })
         
         # Check for low battery SOC
         for pack in data["storage"]["batteryPacks"]:
-            if pack["soc"] < 30:
-                new_alerts.append({
-                    "id": len(self.alerts) + len(new_alerts) + 1,
-                    "type": "warning",
-                    "message": f"Battery Pack {pack['id']} SOC critically low ({pack['soc']}%)",
-                    "time": current_time
-                })
-            elif pack["soc"] < 50:
-                new_alerts.append({
-                    "id": len(self.alerts) + len(new_alerts) + 1,
-                    "type": "info",
-                    "message": f"Battery Pack {pack['id']} SOC below 50% ({pack['soc']}%)",
-                    "time": current_time
-                })
+            soc = pack["soc"]
+            if soc < 30:
+                if is_new(("soc_critical", pack["id"])):
+                    add_alert("warning", f"Battery Pack {pack['id']} SOC critically low ({soc}%)")
+            elif soc < 50:
+                if is_new(("soc_low", pack["id"])):
+                    add_alert("info", f"Battery Pack {pack['id']} SOC below 50% ({soc}%)")
         
         # Check weather conditions
-        if data["weather"]["cloudCover"] > 70:
-            new_alerts.append({
-                "id": len(self.alerts) + len(new_alerts) + 1,
-                "type": "info",
-                "message": "High cloud cover detected - solar generation reduced",
-                "time": current_time
-            })
+        if data["weather"]["cloudCover"] > 70 and is_new(("cloud_cover",)):
+            add_alert("info", "High cloud cover detected - solar generation reduced")
         
         # Check power quality
-        if abs(data["systemMetrics"]["powerQuality"]["voltage"] - 230) > 10:
-            new_alerts.append({
-                "id": len(self.alerts) + len(new_alerts) + 1,
-                "type": "warning",
-                "message": f"Voltage deviation: {data['systemMetrics']['powerQuality']['voltage']}V",
-                "time": current_time
-            })
+        voltage = data["systemMetrics"]["powerQuality"]["voltage"]
+        if abs(voltage - 230) > 10 and is_new(("voltage",)):
+            add_alert("warning", f"Voltage deviation: {voltage}V")
+        
+        self._active_alerts = active_alerts
         
         # Add new alerts and keep only recent ones
-        self.alerts.extend(new_alerts)
-        self.alerts = self.alerts[-10:]  # Keep only last 10 alerts
+        if new_alerts:
+            self.alerts.extend(new_alerts)
+            self.alerts = self.alerts[-10:]  # Keep only last 10 alerts
         
         return self.alerts
     
-    def generate_data(self):
+    def generate_data(self, include_history=True):
         """Generate complete microgrid simulation data"""
+        # Single clock read so every subsystem and the emitted timestamps agree
+        now = datetime.now()
+        hhmm = now.strftime("%H:%M")
+        
+        # One batched uniform [0, 1) draw per tick into the reused buffer, sliced per subsystem below
+        r = self._rng.random(out=self._scratch)
+        
         # Get real-time weather data
-        weather_data = self.get_realtime_weather()
+        weather_data = self.get_realtime_weather(r[0:5], now)
         
-        # Get solar data from CSV
-        solar_data = self.get_solar_data_from_csv()
-        wind_data = self.simulate_wind_generation(weather_data)
-        cbg_data = self.simulate_cbg_generation()
+        # Get solar data from CSV (one nearest-time lookup shared by the tick)
+        csv_row = self._lookup_csv_row(now) if self.solar_data is not None else None
+        solar_data = self.get_solar_data_from_csv(csv_row, r[5:8], now)
+        wind_data = self.simulate_wind_generation(weather_data, r[8:10])
+        cbg_data = self.simulate_cbg_generation(r[10:12])
         
         total_generation = solar_data["acPower"] + wind_data["power"] + cbg_data["power"]
         
         # Simulate demand
-        demand_data = self.simulate_demand()
+        demand_data = self.simulate_demand(r[12:15], now)
         
         # Calculate net power for battery management
         net_power = total_generation - demand_data["totalLoad"]
         
         # Simulate battery system
-        storage_data = self.simulate_battery_system(net_power)
+        storage_data = self.simulate_battery_system(net_power, r[15:27])
         
         # Calculate system metrics
         generation_data = {
@@ -466,11 +690,11 @@ class MicrogridSimulator:
             "totalGeneration": round(total_generation, 1)
         }
         
-        system_metrics = self.calculate_system_metrics(generation_data, demand_data)
+        system_metrics = self.calculate_system_metrics(generation_data, demand_data, r[27:32])
         
         # Compile all data
         complete_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now,  # orjson writes datetimes in ISO 8601 natively
             "generation": generation_data,
             "storage": storage_data,
             "demand": demand_data,
@@ -480,42 +704,69 @@ class MicrogridSimulator:
         }
         
         # Generate alerts
-        complete_data["alerts"] = self.generate_alerts(complete_data)
+        complete_data["alerts"] = self.generate_alerts(complete_data, hhmm)
         
         # Store historical data
         historical_point = {
-            "time": datetime.now().strftime("%H:%M"),
+            "time": hhmm,
             "generation": total_generation,
             "demand": demand_data["totalLoad"],
             "efficiency": system_metrics["overallEfficiency"]
         }
         
+        # Bounded deque drops the oldest point on append
         self.historical_data.append(historical_point)
-        if len(self.historical_data) > self.max_history:
-            self.historical_data.pop(0)
+        self._history_frags.append(orjson.dumps(historical_point, option=orjson.OPT_SERIALIZE_NUMPY))
         
-        complete_data["historicalData"] = self.historical_data
+        # Snapshot copy for Python callers; encode_payload splices _history_frags instead,
+        # so the encoding paths skip it (later ticks must not mutate what callers hold)
+        if include_history:
+            complete_data["historicalData"] = list(self.historical_data)
         
         return complete_data
+    
+    def encode_payload(self, data):
+        """Encode the latest generate_data() result, splicing in the pre-encoded history"""
+        if "historicalData" in data:
+            data = {key: value for key, value in data.items() if key != "historicalData"}
+        body = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+        return body[:-1] + b',"historicalData":[' + b",".join(self._history_frags) + b"]}"
 
 # Create the simulator instance
 simulator = MicrogridSimulator()
 
+async def produce_updates():
+    """Single producer: generate each tick once and fan it out to all clients"""
+    while True:
+        # Skip generation while nobody is listening
+        if manager.active_connections:
+            # A failed tick must not end the only producer every client depends on
+            try:
+                # Generate new simulation data
+                data = simulator.generate_data(include_history=False)
+
+                # Encode once and send the same bytes to all connected clients
+                await manager.broadcast(simulator.encode_payload(data))
+            except Exception as e:
+                print(f"Update tick error: {e}")
+        
+        # Wait 2 seconds before next update, or less if a client is waiting for its first frame
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(manager.payload_needed.wait(), UPDATE_INTERVAL)
+        manager.payload_needed.clear()
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     try:
+        # Updates arrive from the producer; just wait until the client goes away
         while True:
-            # Generate new simulation data
-            data = simulator.generate_data()
-            
-            # Send to all connected clients
-            await manager.broadcast(json.dumps(data))
-            
-            # Wait 2 seconds before next update
-            await asyncio.sleep(2)
-            
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 @app.get("/")
@@ -529,7 +780,8 @@ async def api_info():
 @app.get("/current-data")
 async def get_current_data():
     """Get current simulation data via REST API"""
-    return simulator.generate_data()
+    # Encode with orjson directly instead of FastAPI's jsonable_encoder + json.dumps
+    return Response(content=simulator.encode_payload(simulator.generate_data(include_history=False)), media_type="application/json")
 
 @app.get("/weather")
 async def get_weather():
@@ -540,4 +792,14 @@ if __name__ == "__main__":
     print("Starting Microgrid Simulation Server...")
     print("WebSocket endpoint: ws://localhost:8000/ws")
     print("REST endpoint: http://localhost:8000/current-data")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        # "auto" picks uvloop/httptools when installed (uvicorn[standard]) and falls back otherwise
+        loop="auto",
+        http="auto",
+        ws="websockets",
+        # Clients never send data, so cap inbound frames at 1 MiB
+        ws_max_size=1_048_576
+    )
@@ -1,28 +1,44 @@
 
 import json
-import random
 import math
 import time
 from datetime import datetime
+import numpy as np
+
+# Hour-of-day curves only take 24 values, so evaluate them once at import
+_SOLAR_FACTOR = tuple(
+    max(0.0, math.sin(math.pi * (h - 6) / 12)) if 6 <= h <= 18 else 0.0
+    for h in range(24)
+)
+_DEMAND_BASE = tuple(40 + 20 * math.sin(math.pi * (h - 6) / 12) for h in range(24))
 
 class SimpleMicrogridDataGenerator:
     def __init__(self):
-        self.battery_socs = [72, 68, 65, 63]
+        self._rng = np.random.default_rng()
+        self.battery_socs = np.array([72, 68, 65, 63], dtype=np.float32)
         self.alerts = []
 
-    def get_time_factor(self):
+    def get_time_factor(self, now=None):
         """Solar generation based on time of day"""
-        hour = datetime.now().hour
-        if 6 <= hour <= 18:
-            return max(0, math.sin(math.pi * (hour - 6) / 12))
-        return 0
+        if now is None:
+            now = datetime.now()
+        return _SOLAR_FACTOR[now.hour]
 
     def generate_sample_data(self):
         """Generate a sample of microgrid data"""
-        time_factor = self.get_time_factor()
+        now = datetime.now()
+        time_factor = self.get_time_factor(now)
+
+        # One batched uniform [0, 1) draw for the whole sample: named scalars, then per-pack rows
+        num_packs = len(self.battery_socs)
+        r = self._rng.random(19 + 3 * num_packs)
+        (r_cloud, r_wind, r_cbg, r_load, r_wind_eff, r_cbg_eff, r_charge, r_peak, r_sys_eff,
+         r_uptime, r_volt, r_freq, r_thd, r_temp, r_hum, r_cover,
+         r_alert_type, r_alert_pack, r_alert_soc) = r[:19].tolist()
+        r_delta, r_soh, r_pack_temp = r[19:].reshape(3, num_packs)
 
         # Weather simulation
-        irradiance = 875 * time_factor * random.uniform(0.7, 1.0)
+        irradiance = 875 * time_factor * (0.7 + 0.3 * r_cloud)
         irradiance = max(0, min(1200, irradiance))
 
         # Solar generation
@@ -30,24 +46,25 @@ class SimpleMicrogridDataGenerator:
         solar_ac = solar_dc * 0.95
 
         # Wind generation
-        wind_speed = 8.2 + random.uniform(-2, 3)
+        wind_speed = 8.2 + (-2 + 5 * r_wind)
         wind_power = min(25, 0.5 * wind_speed ** 2.5) if wind_speed > 3 else 0
 
         # Biogas
-        cbg_power = 18.5 + random.uniform(-2, 2)
+        cbg_power = 18.5 + (-2 + 4 * r_cbg)
 
-        # Battery simulation
-        for i in range(len(self.battery_socs)):
-            self.battery_socs[i] += random.uniform(-0.5, 0.5)
-            self.battery_socs[i] = max(20, min(95, self.battery_socs[i]))
+        # Battery simulation (all packs in one vectorized step)
+        self.battery_socs += -0.5 + r_delta
+        np.clip(self.battery_socs, 20, 95, out=self.battery_socs)
+        sohs = 93 + (6 * r_soh).astype(int)
+        temps = 23 + 3 * r_pack_temp
+        voltages = 48 + (self.battery_socs - 50) * 0.02
 
         # Demand simulation
-        hour = datetime.now().hour
-        base_demand = 40 + 20 * math.sin(math.pi * (hour - 6) / 12)
-        total_demand = max(25, base_demand + random.uniform(-5, 10))
+        base_demand = _DEMAND_BASE[now.hour]
+        total_demand = max(25, base_demand + (-5 + 15 * r_load))
 
         data = {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
             "generation": {
                 "solar": {
                     "dcPower": round(max(0, solar_dc), 1),
@@ -59,59 +76,61 @@ class SimpleMicrogridDataGenerator:
                 "wind": {
                     "power": round(max(0, wind_power), 1),
                     "windSpeed": round(wind_speed, 1),
-                    "efficiency": round(random.uniform(87, 92), 1)
+                    "efficiency": round(87 + 5 * r_wind_eff, 1)
                 },
                 "cbg": {
                     "power": round(max(0, cbg_power), 1),
                     "status": "operational",
-                    "efficiency": round(random.uniform(89, 94), 1)
+                    "efficiency": round(89 + 5 * r_cbg_eff, 1)
                 },
                 "totalGeneration": round(max(0, solar_ac) + max(0, wind_power) + max(0, cbg_power), 1)
             },
             "storage": {
-                "overallSOC": round(sum(self.battery_socs) / len(self.battery_socs), 0),
+                "overallSOC": round(float(self.battery_socs.mean()), 0),
                 "totalCapacity": 150,
-                "chargePower": round(random.uniform(0, 15), 1),
+                "chargePower": round(15 * r_charge, 1),
                 "dischargePower": 0,
                 "batteryPacks": [
                     {
                         "id": i + 1,
                         "soc": round(soc, 0),
-                        "soh": random.randint(93, 98),
-                        "temp": round(random.uniform(23, 26), 1),
-                        "voltage": round(48 + (soc - 50) * 0.02, 1)
+                        "soh": soh,
+                        "temp": round(temp, 1),
+                        "voltage": round(voltage, 1)
                     }
-                    for i, soc in enumerate(self.battery_socs)
+                    for i, (soc, soh, temp, voltage) in enumerate(zip(
+                        self.battery_socs.tolist(), sohs.tolist(), temps.tolist(), voltages.tolist()
+                    ))
                 ]
             },
             "demand": {
                 "totalLoad": round(total_demand, 1),
                 "criticalLoads": round(total_demand * 0.4, 1),
                 "flexibleLoads": round(total_demand * 0.6, 1),
-                "peakReduction": round(random.uniform(20, 30), 1)
+                "peakReduction": round(20 + 10 * r_peak, 1)
             },
             "systemMetrics": {
-                "overallEfficiency": round(random.uniform(90, 95), 1),
-                "uptime": round(random.uniform(99.5, 99.9), 2),
+                "overallEfficiency": round(90 + 5 * r_sys_eff, 1),
+                "uptime": round(99.5 + 0.4 * r_uptime, 2),
                 "powerQuality": {
-                    "voltage": round(230 + random.uniform(-5, 5), 1),
-                    "frequency": round(50 + random.uniform(-0.1, 0.1), 2),
-                    "thd": round(random.uniform(1.0, 2.5), 1)
+                    "voltage": round(230 + (-5 + 10 * r_volt), 1),
+                    "frequency": round(50 + (-0.1 + 0.2 * r_freq), 2),
+                    "thd": round(1.0 + 1.5 * r_thd, 1)
                 }
             },
             "weather": {
-                "temperature": round(28.5 + random.uniform(-3, 3), 1),
-                "humidity": round(random.uniform(50, 85), 0),
+                "temperature": round(28.5 + (-3 + 6 * r_temp), 1),
+                "humidity": round(50 + 35 * r_hum, 0),
                 "windSpeed": round(wind_speed, 1),
                 "irradiance": round(irradiance, 0),
-                "cloudCover": round(random.uniform(10, 80), 0)
+                "cloudCover": round(10 + 70 * r_cover, 0)
             },
             "alerts": [
                 {
                     "id": 1,
-                    "type": "info" if random.random() > 0.3 else "warning",
-                    "message": f"Battery Pack {random.randint(1,4)} SOC at {round(random.uniform(45, 65))}%",
-                    "time": datetime.now().strftime("%H:%M")
+                    "type": "info" if r_alert_type > 0.3 else "warning",
+                    "message": f"Battery Pack {1 + int(4 * r_alert_pack)} SOC at {round(45 + 20 * r_alert_soc)}%",
+                    "time": now.strftime("%H:%M")
                 }
             ]
         }